@@ -0,0 +1,401 @@
+"""
+bench.py
+
+Benchmarks (micro y macro) de las rutas críticas del proyecto:
+- timer.py:     render_frame, TimerState.tick
+- example.py:   make_test_image, load_image
+- db_fill.py:   gen_name / gen_prof / gen_val, build_rows, insert_rows (200 filas)
+- db_schema.py: describe_tables (SHOW TABLES + SHOW COLUMNS)
+
+Los casos de BD usan MySQL si BENCH_MYSQL=1 (credenciales DB_* como el resto de scripts,
+sobre una tabla auxiliar `tbl001_bench` que se borra al terminar). Si no, usan un sustituto
+embebido en SQLite (en memoria) que entiende el SQL de los scripts.
+
+Los resultados se guardan como baseline JSON y, al comparar, el script termina con código 1
+si algún caso es más lento que la baseline por encima del umbral, o si un caso de la baseline
+no se pudo medir (p.ej. dependencia ausente). Para no confundir ruido con regresión, cada caso
+tolera además su dispersión (mediana frente a mejor ronda, en la baseline y ahora), y un caso
+que parece más lento se vuelve a medir con el doble de rondas antes de darlo por regresión.
+Genera `bench.log`.
+
+Uso:
+    python bench.py --save                 # medir y guardar bench_baseline.json
+    python bench.py                        # medir y comparar (umbral 20%)
+    python bench.py -k db_ --threshold 0.3 # solo casos cuyo nombre contiene 'db_'
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Optional
+
+import profiling
+
+LOG = 'bench.log'
+BASELINE = 'bench_baseline.json'
+
+out: list[str] = []
+
+
+def log(s: str = '') -> None:
+    print(s)
+    out.append(s)
+
+
+# --------------------------------------------------------------------------- #
+# REGISTRO DE CASOS
+# Cada caso es una función de preparación que devuelve el callable a medir, o
+# (callable, reset) si hay que restaurar el estado antes de cada llamada.
+# --------------------------------------------------------------------------- #
+CASES: dict[str, Callable[[], object]] = {}
+_cleanup: list[Callable[[], None]] = []
+
+
+def case(name: str):
+    def deco(fn):
+        CASES[name] = fn
+        return fn
+    return deco
+
+
+# --------------------------------------------------------------------------- #
+# SUSTITUTO EMBEBIDO DE MYSQL (SQLite)
+# --------------------------------------------------------------------------- #
+def _like_to_regex(pattern: str) -> re.Pattern:
+    return re.compile('^' + re.escape(pattern).replace('%', '.*').replace('_', '.') + '$')
+
+
+class SqliteCursor:
+    """Cursor SQLite que acepta lo que usan los scripts de MySQL: SHOW ... y parámetros %s."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._cur = conn.cursor()
+        self._rows: Optional[list] = None
+
+    def execute(self, sql: str, params=()) -> None:
+        s = sql.strip()
+        m = re.match(r"SHOW TABLES(?: LIKE '([^']*)')?$", s, re.I)
+        if m:
+            self._cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' ORDER BY name")
+            names = [r[0] for r in self._cur.fetchall()]
+            if m.group(1):
+                rx = _like_to_regex(m.group(1))
+                names = [n for n in names if rx.match(n)]
+            self._rows = [(n,) for n in names]
+            return
+        m = re.match(r"SHOW COLUMNS FROM `?(\w+)`?(?: LIKE '([^']*)')?$", s, re.I)
+        if m:
+            self._cur.execute(f"PRAGMA table_info(`{m.group(1)}`)")
+            rows = []
+            for _cid, name, coltype, notnull, default, pk in self._cur.fetchall():
+                extra = 'auto_increment' if pk and coltype.upper() == 'INTEGER' else ''
+                rows.append((name, coltype, 'NO' if notnull or pk else 'YES', 'PRI' if pk else '', default, extra))
+            if m.group(2):
+                rx = _like_to_regex(m.group(2))
+                rows = [r for r in rows if rx.match(r[0])]
+            self._rows = rows
+            return
+        self._rows = None
+        self._cur.execute(s.replace('%s', '?'), params)
+
+    def executemany(self, sql: str, seq) -> None:
+        self._rows = None
+        self._cur.executemany(sql.replace('%s', '?'), seq)
+
+    def fetchone(self):
+        if self._rows is not None:
+            return self._rows.pop(0) if self._rows else None
+        return self._cur.fetchone()
+
+    def fetchall(self):
+        if self._rows is not None:
+            rows, self._rows = self._rows, []
+            return rows
+        return self._cur.fetchall()
+
+    def close(self) -> None:
+        self._cur.close()
+
+
+_db = None
+
+
+def get_db():
+    """Devuelve (conn, cursor, tabla_insert, auto_inc) reutilizados por todos los casos de BD."""
+    global _db
+    if _db is not None:
+        return _db
+    if os.environ.get('BENCH_MYSQL') == '1':
+        import mysql.connector
+        import db_fill
+
+        c = db_fill.creds
+        conn = mysql.connector.connect(host=c['host'], port=c['port'], user=c['user'], password=c['password'], database=db_fill.DB)
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE IF NOT EXISTS tbl001_bench LIKE tbl001")
+        auto_inc = db_fill.is_auto_increment(cursor)
+
+        def drop():
+            cursor.execute("DROP TABLE IF EXISTS tbl001_bench")
+            cursor.close()
+            conn.close()
+
+        _cleanup.append(drop)
+        _db = (conn, cursor, 'tbl001_bench', auto_inc)
+    else:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE TABLE tbl001 (id_registro INTEGER PRIMARY KEY AUTOINCREMENT, "
+                     "registro_01 VARCHAR(100), registro_02 VARCHAR(100), registro_03 DECIMAL(10,2))")
+        for i in range(2, 6):
+            conn.execute(f"CREATE TABLE tbl00{i} (id INTEGER PRIMARY KEY, nombre VARCHAR(100), valor REAL)")
+        conn.commit()
+        _cleanup.append(conn.close)
+        _db = (conn, SqliteCursor(conn), 'tbl001', True)
+    return _db
+
+
+def db_backend() -> str:
+    return 'mysql' if os.environ.get('BENCH_MYSQL') == '1' else 'sqlite'
+
+
+# --------------------------------------------------------------------------- #
+# CASOS
+# --------------------------------------------------------------------------- #
+@case('timer.render_frame')
+def bench_render_frame():
+    from timer import TimerState, render_frame
+
+    state = TimerState(120)
+    return lambda: render_frame(state)
+
+
+@case('timer.tick')
+def bench_tick():
+    from timer import TimerState
+
+    state = TimerState(3600)
+    return state.tick
+
+
+@case('example.make_test_image')
+def bench_make_test_image():
+    from example import make_test_image
+
+    return make_test_image
+
+
+@case('example.load_image')
+def bench_load_image():
+    import cv2
+    from example import load_image, make_test_image
+
+    fd, path = tempfile.mkstemp(suffix='.png')
+    os.close(fd)
+    _cleanup.append(lambda: os.remove(path))
+    cv2.imwrite(path, cv2.cvtColor(make_test_image(), cv2.COLOR_RGB2BGR))
+    return lambda: load_image(path)
+
+
+@case('db_fill.gen_name')
+def bench_gen_name():
+    from db_fill import gen_name
+
+    return gen_name
+
+
+@case('db_fill.gen_prof')
+def bench_gen_prof():
+    from db_fill import gen_prof
+
+    return gen_prof
+
+
+@case('db_fill.gen_val')
+def bench_gen_val():
+    from db_fill import gen_val
+
+    return gen_val
+
+
+@case('db_fill.build_rows_200')
+def bench_build_rows():
+    from db_fill import build_rows
+
+    return lambda: build_rows(200, ids=range(1, 201))
+
+
+@case('db_fill.insert_rows_200')
+def bench_insert_rows():
+    from db_fill import INSERT_SQL, INSERT_SQL_ID, build_rows, insert_rows
+
+    conn, cursor, table, auto_inc = get_db()
+    if auto_inc:
+        sql = INSERT_SQL.replace('tbl001', table)
+        data = build_rows(200)
+    else:
+        # Igual que db_fill.py: sin AUTO_INCREMENT hay que dar id_registro
+        sql = INSERT_SQL_ID.replace('tbl001', table)
+        data = build_rows(200, ids=range(1, 201))
+
+    def reset():
+        # Tabla vacía antes de cada llamada: el coste no depende de cuánto creció
+        cursor.execute(f"DELETE FROM {table}")
+        conn.commit()
+
+    return (lambda: insert_rows(conn, cursor, sql, data)), reset
+
+
+@case('db_schema.describe_tables')
+def bench_describe_tables():
+    from db_schema import describe_tables
+
+    _conn, cursor, _table, _auto_inc = get_db()
+    return lambda: describe_tables(cursor)
+
+
+# --------------------------------------------------------------------------- #
+# MEDICION Y COMPARACION
+# --------------------------------------------------------------------------- #
+def measure(fn: Callable[[], object], repeat: int, reset: Optional[Callable[[], None]] = None) -> tuple[float, float]:
+    """Tiempo por llamada (s) de `repeat` rondas de ~0.2 s cada una: (mejor, dispersión).
+
+    La dispersión es (mediana - mejor) / mejor. Con `reset`, cada llamada se cronometra por
+    separado y reset() queda fuera de la medida.
+    """
+    if reset is None:
+        timer = timeit.Timer(fn)
+        number, _ = timer.autorange()
+        rounds = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    else:
+        rounds = []
+        for _ in range(repeat):
+            total = 0.0
+            calls = 0
+            while total < 0.2:
+                reset()
+                t0 = time.perf_counter()
+                fn()
+                total += time.perf_counter() - t0
+                calls += 1
+            rounds.append(total / calls)
+    best = min(rounds)
+    return best, (statistics.median(rounds) - best) / best
+
+
+def fmt_time(sec: float) -> str:
+    for unit, scale in (('s', 1.0), ('ms', 1e-3), ('us', 1e-6)):
+        if sec >= scale:
+            return f'{sec / scale:8.2f} {unit}'
+    return f'{sec / 1e-9:8.2f} ns'
+
+
+def run(selected: list[str], repeat: int) -> tuple[dict, dict]:
+    """Mide los casos. Devuelve (resultados, callables preparados para volver a medir)."""
+    results = {}
+    prepared = {}
+    for name in selected:
+        try:
+            p = CASES[name]()
+        except ImportError as e:
+            log(f'{name:32s} | OMITIDO (dependencia ausente: {e})')
+            continue
+        fn, reset = prepared[name] = p if isinstance(p, tuple) else (p, None)
+        sec, spread = measure(fn, repeat, reset)
+        results[name] = {'sec_per_op': sec, 'spread': spread}
+        log(f'{name:32s} | {fmt_time(sec)}/op  (±{spread:.0%})')
+    return results, prepared
+
+
+def compare(results: dict, baseline: dict, threshold: float, selected: list[str],
+            remeasure: Optional[Callable[[str], tuple[float, float]]] = None) -> list[str]:
+    """Devuelve los casos con regresión o que están en la baseline pero no se midieron."""
+    failures = []
+    cases = baseline.get('cases', {})
+    log('')
+    log(f'Comparación contra baseline (umbral +{threshold:.0%} + dispersión de cada caso):')
+    for name, r in results.items():
+        base = cases.get(name)
+        if base is None:
+            log(f'{name:32s} | nuevo (sin baseline)')
+            continue
+        ratio = r['sec_per_op'] / base['sec_per_op']
+        allowed = 1 + threshold + max(base.get('spread', 0.0), r['spread'])
+        if ratio > allowed and remeasure is not None:
+            # Confirmar antes de fallar: un caso de µs se desvía fácilmente en una pasada
+            sec, spread = remeasure(name)
+            log(f'{name:32s} | {ratio:6.2f}x | re-medido: {fmt_time(sec)}/op  (±{spread:.0%})')
+            r['sec_per_op'] = min(r['sec_per_op'], sec)
+            ratio = r['sec_per_op'] / base['sec_per_op']
+        status = 'REGRESION' if ratio > allowed else 'ok'
+        log(f'{name:32s} | {ratio:6.2f}x | {status} (tolerado {allowed:.2f}x)')
+        if status != 'ok':
+            failures.append(name)
+    for name in sorted(cases):
+        if name in selected and name not in results:
+            log(f'{name:32s} | AUSENTE (en la baseline pero no medido)')
+            failures.append(name)
+    return failures
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Benchmarks del proyecto con baseline JSON y control de regresiones')
+    p.add_argument('-k', '--filter', type=str, default='', help='Solo casos cuyo nombre contiene este texto')
+    p.add_argument('--baseline', type=str, default=BASELINE, help='Fichero JSON de baseline')
+    p.add_argument('--save', action='store_true', help='Guardar los resultados como nueva baseline')
+    p.add_argument('--threshold', type=float, default=0.20, help='Empeoramiento relativo tolerado (0.20 = 20%%)')
+    p.add_argument('--repeat', type=int, default=5, help='Rondas por caso (se toma la mejor)')
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv or sys.argv[1:])
+    selected = [n for n in CASES if args.filter in n]
+    if not selected:
+        print(f"Error: ningún caso coincide con '{args.filter}'", file=sys.stderr)
+        return 2
+
+    log(f"Benchmarks {time.strftime('%Y-%m-%d %H:%M:%S')} | python {platform.python_version()} | "
+        f"{platform.machine()} | BD={db_backend()}")
+    code = 0
+    try:
+        with profiling.phase('casos'):
+            results, prepared = run(selected, args.repeat)
+
+        if args.save:
+            data = {'meta': {'python': platform.python_version(), 'machine': platform.machine(), 'db': db_backend()},
+                    'cases': results}
+            with open(args.baseline, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            log(f'Baseline guardada en: {args.baseline}')
+        elif os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            if baseline.get('meta', {}).get('db') != db_backend():
+                log(f"WARN: la baseline se midió con BD={baseline.get('meta', {}).get('db')}; los casos db_* no son comparables.")
+            failures = compare(results, baseline, args.threshold, selected,
+                               lambda name: measure(prepared[name][0], 2 * args.repeat, prepared[name][1]))
+            if failures:
+                log(f"ERROR: {len(failures)} caso(s) con regresión o sin medir: {', '.join(failures)}")
+                code = 1
+        else:
+            log(f'Sin baseline ({args.baseline}); ejecuta con --save para crearla.')
+    finally:
+        for fn in reversed(_cleanup):
+            fn()
+
+    with open(LOG, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out))
+    return code
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
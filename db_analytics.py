@@ -0,0 +1,186 @@
+"""
+db_analytics.py
+
+Agregados de `tbl001` calculados en el servidor: número, media, mínimo y máximo de
+`registro_03` agrupados por `registro_02` (profesión).
+
+Acciones:
+- consulta      GROUP BY directo sobre tbl001 (usa el índice cubriente si existe).
+- indice        crea el índice cubriente `idx_tbl001_r02_r03` (registro_02, registro_03).
+- reconstruir   crea/rellena la tabla resumen `tbl001_resumen` desde tbl001.
+- resumen       lee los agregados de `tbl001_resumen` (una fila por profesión).
+
+db_fill.py mantiene `tbl001_resumen` al insertar cada lote, en la misma transacción,
+si la tabla existe. Los UPDATE/DELETE hechos fuera de db_fill no se reflejan: en ese caso
+hay que ejecutar `reconstruir`. Las filas con registro_02 NULL no entran en el resumen.
+
+Uso:
+    python db_analytics.py indice
+    python db_analytics.py reconstruir
+    python db_analytics.py resumen
+    python db_analytics.py consulta
+
+Usa variables de entorno para las credenciales: DB_HOST, DB_PORT, DB_USER, DB_PASS, DB_NAME
+Genera un log en `db_analytics.log`.
+"""
+import argparse
+import os
+import sys
+import time
+
+import profiling
+
+LOG = 'db_analytics.log'
+
+creds = {
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '3306')),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASS', '123456'),
+}
+DB = os.environ.get('DB_NAME', 'pruebas02')
+
+INDEX = 'idx_tbl001_r02_r03'
+SUMMARY = 'tbl001_resumen'
+
+SUMMARY_DDL = f"""CREATE TABLE IF NOT EXISTS {SUMMARY} (
+    registro_02 VARCHAR(255) NOT NULL PRIMARY KEY,
+    n BIGINT NOT NULL,
+    suma DECIMAL(20,2) NOT NULL,
+    minimo DECIMAL(12,2) NULL,
+    maximo DECIMAL(12,2) NULL
+)"""
+
+AGG_SQL = ("SELECT registro_02, COUNT(registro_03), AVG(registro_03), MIN(registro_03), MAX(registro_03) "
+           "FROM tbl001 GROUP BY registro_02 ORDER BY registro_02")
+SUMMARY_SQL = f"SELECT registro_02, n, suma / NULLIF(n, 0), minimo, maximo FROM {SUMMARY} ORDER BY registro_02"
+# LEAST/GREATEST devuelven NULL si el valor guardado es NULL (profesión sin registro_03):
+# COALESCE toma entonces el del lote. Se usa VALUES() y no el alias de fila de MySQL 8.0.19+
+# porque este último no existe en MariaDB ni en MySQL 5.7.
+UPSERT_SQL = (f"INSERT INTO {SUMMARY} (registro_02, n, suma, minimo, maximo) VALUES (%s, %s, %s, %s, %s) "
+              "ON DUPLICATE KEY UPDATE n = n + VALUES(n), suma = suma + VALUES(suma), "
+              "minimo = COALESCE(LEAST(minimo, VALUES(minimo)), VALUES(minimo)), "
+              "maximo = COALESCE(GREATEST(maximo, VALUES(maximo)), VALUES(maximo))")
+
+out = []
+def log(s=''):
+    ts = time.strftime('%Y-%m-%d %H:%M:%S')
+    line = f"[{ts}] {s}"
+    print(line)
+    out.append(line)
+
+def write_log():
+    with open(LOG,'w',encoding='utf-8') as f:
+        f.write('\n'.join(out))
+
+def has_summary(cursor):
+    cursor.execute(f"SHOW TABLES LIKE '{SUMMARY}'")
+    return cursor.fetchone() is not None
+
+def update_summary(cursor, pairs):
+    """Suma al resumen un lote de pares (registro_02, registro_03). No hace commit."""
+    agg = {}
+    for prof, val in pairs:
+        if prof is None or val is None:
+            continue
+        n, suma, mn, mx = agg.get(prof, (0, 0.0, val, val))
+        agg[prof] = (n + 1, suma + val, min(mn, val), max(mx, val))
+    if agg:
+        # Siempre en el mismo orden: dos db_fill.py concurrentes bloquean las filas del
+        # resumen hasta su commit y, en orden distinto, acabarían en deadlock
+        cursor.executemany(UPSERT_SQL, [(prof, n, round(suma, 2), mn, mx) for prof, (n, suma, mn, mx) in sorted(agg.items())])
+
+def has_covering_index(cursor):
+    cursor.execute("SHOW INDEX FROM tbl001")
+    keys = {}
+    for row in cursor.fetchall():
+        # Table, Non_unique, Key_name, Seq_in_index, Column_name, ...
+        keys.setdefault(row[2], {})[row[3]] = row[4]
+    return any([cols.get(1), cols.get(2)] == ['registro_02', 'registro_03'] for cols in keys.values())
+
+def ensure_index(conn, cursor):
+    if has_covering_index(cursor):
+        log('El índice cubriente (registro_02, registro_03) ya existe.')
+        return False
+    sql = f"CREATE INDEX {INDEX} ON tbl001 (registro_02, registro_03)"
+    log(f"Ejecutando: {sql}")
+    cursor.execute(sql)
+    conn.commit()
+    return True
+
+def rebuild_summary(conn, cursor):
+    cursor.execute(SUMMARY_DDL)
+    try:
+        cursor.execute(f"DELETE FROM {SUMMARY}")
+        cursor.execute(
+            f"INSERT INTO {SUMMARY} (registro_02, n, suma, minimo, maximo) "
+            "SELECT registro_02, COUNT(registro_03), COALESCE(SUM(registro_03), 0), MIN(registro_03), MAX(registro_03) "
+            "FROM tbl001 WHERE registro_02 IS NOT NULL GROUP BY registro_02"
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def log_rows(rows):
+    log(f"{'registro_02':<20} | {'n':>8} | {'media':>10} | {'mínimo':>10} | {'máximo':>10}")
+    for prof, n, avg, mn, mx in rows:
+        avg_s = f"{float(avg):10.2f}" if avg is not None else f"{'NULL':>10}"
+        log(f"{str(prof):<20} | {n:>8} | {avg_s} | {str(mn):>10} | {str(mx):>10}")
+
+def run_action(conn, cursor, accion):
+    if accion == 'indice':
+        ensure_index(conn, cursor)
+    elif accion == 'reconstruir':
+        rebuild_summary(conn, cursor)
+        cursor.execute(f"SELECT COUNT(*) FROM {SUMMARY}")
+        log(f"Tabla '{SUMMARY}' reconstruida: {cursor.fetchone()[0]} profesiones.")
+    elif accion == 'consulta':
+        if not has_covering_index(cursor):
+            log("WARN: falta el índice cubriente; la consulta recorrerá tbl001 (ejecuta 'indice').")
+        cursor.execute(AGG_SQL)
+        log_rows(cursor.fetchall())
+    else:
+        if not has_summary(cursor):
+            log(f"ERROR: tabla '{SUMMARY}' no encontrada. Ejecuta 'reconstruir' primero.")
+            return 4
+        cursor.execute(SUMMARY_SQL)
+        log_rows(cursor.fetchall())
+    return 0
+
+def main():
+    p = argparse.ArgumentParser(description='Agregados de tbl001 por profesión calculados en el servidor')
+    p.add_argument('accion', nargs='?', default='resumen', choices=['consulta', 'indice', 'reconstruir', 'resumen'],
+                   help='Acción a realizar (por defecto: resumen)')
+    args = p.parse_args()
+
+    try:
+        import mysql.connector
+    except Exception as e:
+        log(f'ERROR: mysql connector missing: {e}')
+        write_log()
+        return 2
+
+    try:
+        log(f"Conectando a {creds['host']}:{creds['port']} como {creds['user']} a DB '{DB}'")
+        conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=DB)
+        cursor = conn.cursor()
+        t0 = time.perf_counter()
+        with profiling.phase(args.accion):
+            code = run_action(conn, cursor, args.accion)
+        if code == 0:
+            log(f"Acción '{args.accion}' completada en {(time.perf_counter() - t0) * 1000:.1f} ms")
+        cursor.close()
+        conn.close()
+    except mysql.connector.Error as err:
+        log('ERROR: ' + str(err))
+        import traceback
+        out.append(traceback.format_exc())
+        write_log()
+        return 3
+
+    write_log()
+    return code
+
+if __name__ == '__main__':
+    sys.exit(main())
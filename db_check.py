@@ -3,10 +3,27 @@ db_check.py
 
 Comprueba conexión a MySQL y existencia de la base de datos especificada.
 Escribe resultados en stdout y en db_check.log
+
+Modo comparación (`--compare [DB_A DB_B]`, por defecto pruebas02 y pruebas_02): verifica que
+`tbl001` tenga los mismos datos en ambas BDs sin transferir las tablas. Divide la tabla en
+rangos de `id_registro`, calcula en el servidor un checksum por rango en las dos BDs en
+paralelo, subdivide solo los rangos que difieren y al final compara fila a fila los rangos
+pequeños para informar de los `id_registro` exactos que difieren (`id_registro` no tiene por
+qué ser PK: un id repetido en una BD y no en la otra también cuenta como diferencia). Sale
+con código 1 si hay diferencias, incluidos rangos cuyo checksum difiere pero en los que la
+comparación fila a fila no encuentra la fila (p.ej. escrituras entre las dos pasadas).
+
+    python db_check.py --compare
+    python db_check.py --compare pruebas02 pruebas_02 --chunk 5000 --jobs 8
 """
+import argparse
 import sys
 import os
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import profiling
 
 LOG = 'db_check.log'
 creds = {
@@ -23,7 +40,22 @@ if creds['user'] == 'root' and creds['password'] == '':
 
 db_to_check = os.environ.get('DB_NAME', 'pruebas_02')
 
+parser = argparse.ArgumentParser(description='Comprueba la conexión a MySQL o compara tbl001 entre dos BDs')
+parser.add_argument('--compare', nargs='*', metavar='DB', default=None,
+                    help='Comparar tbl001 entre dos BDs (por defecto: pruebas02 pruebas_02)')
+parser.add_argument('--table', default='tbl001', help='Tabla a comparar (clave id_registro)')
+parser.add_argument('--chunk', type=int, default=10000, help='Ancho inicial de cada rango de id_registro')
+parser.add_argument('--leaf', type=int, default=64, help='Ancho a partir del cual se compara fila a fila')
+parser.add_argument('--jobs', type=int, default=4, help='Consultas de checksum en paralelo')
+parser.add_argument('--max-report', type=int, default=50, help='Máximo de filas distintas a mostrar')
+args = parser.parse_args()
+if args.compare is not None and len(args.compare) not in (0, 2):
+    parser.error('--compare necesita dos nombres de BD (o ninguno para los valores por defecto)')
+if args.chunk <= 0 or args.leaf <= 0 or args.jobs <= 0:
+    parser.error('--chunk, --leaf y --jobs deben ser mayores que 0')
+
 out_lines = []
+profiling.script_phase()
 
 def log(msg):
     print(msg)
@@ -38,6 +70,158 @@ except Exception as e:
         f.write('\n'.join(out_lines))
     sys.exit(2)
 
+
+# --------------------------------------------------------------------------- #
+# COMPARACION DE tbl001 ENTRE DOS BDs (checksums por rangos de id_registro)
+# --------------------------------------------------------------------------- #
+FANOUT = 8  # subrangos en los que se parte un rango distinto
+_local = threading.local()
+_conns = []
+_conns_lock = threading.Lock()
+
+def db_cursor(db):
+    """Cursor de una conexión propia del hilo actual para la BD `db`."""
+    cursors = getattr(_local, 'cursors', None)
+    if cursors is None:
+        cursors = _local.cursors = {}
+    if db not in cursors:
+        conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=db)
+        with _conns_lock:
+            _conns.append(conn)
+        cursors[db] = conn.cursor()
+    return cursors[db]
+
+def row_hash_sql(columns):
+    # Cada valor va como <longitud>:<valor> (o N si es NULL): así ('a#b','c') y ('a','b#c')
+    # no producen la misma cadena y NULL se distingue de la cadena vacía
+    fields = ', '.join(f"IFNULL(CONCAT(CHAR_LENGTH(`{c}`), ':', `{c}`), 'N')" for c in columns)
+    return f"CRC32(CONCAT_WS('#', {fields}))"
+
+def chunk_checksum(db, table, h, lo, hi):
+    cur = db_cursor(db)
+    cur.execute(f"SELECT COUNT(*), COALESCE(SUM({h}), 0), COALESCE(BIT_XOR({h}), 0) FROM `{table}` WHERE id_registro BETWEEN %s AND %s", (lo, hi))
+    return tuple(int(v) for v in cur.fetchone())
+
+def range_differs(dbs, table, h, rng):
+    a, b = dbs
+    return chunk_checksum(a, table, h, *rng) != chunk_checksum(b, table, h, *rng)
+
+def row_hashes(db, table, h, lo, hi):
+    cur = db_cursor(db)
+    cur.execute(f"SELECT id_registro, {h} FROM `{table}` WHERE id_registro BETWEEN %s AND %s", (lo, hi))
+    # Lista ordenada de hashes por id: un id_registro repetido no se colapsa
+    hashes = {}
+    for k, v in cur.fetchall():
+        hashes.setdefault(k, []).append(v)
+    return {k: sorted(v) for k, v in hashes.items()}
+
+def split(lo, hi, width):
+    return [(x, min(hi, x + width - 1)) for x in range(lo, hi + 1, width)]
+
+def fetch_rows(db, table, columns, ids):
+    # id_registro no tiene por qué ser la primera columna: se indexa por su posición
+    key = columns.index('id_registro')
+    cols = ', '.join(f"`{c}`" for c in columns)
+    cur = db_cursor(db)
+    cur.execute(f"SELECT {cols} FROM `{table}` WHERE id_registro IN ({', '.join(['%s'] * len(ids))})", tuple(ids))
+    rows = {}
+    for r in cur.fetchall():
+        rows.setdefault(r[key], []).append(r)
+    return rows
+
+def fmt_row(row):
+    return ' | '.join(str(x) if x is not None else 'NULL' for x in row) if row else '<<missing>>'
+
+def compare_tables(db_a, db_b, table, chunk, leaf, jobs, max_report):
+    dbs = (db_a, db_b)
+    cols = {}
+    bounds = []
+    for db in dbs:
+        cur = db_cursor(db)
+        cur.execute(f"SHOW COLUMNS FROM `{table}`")
+        cols[db] = [r[0] for r in cur.fetchall()]
+        cur.execute(f"SELECT MIN(id_registro), MAX(id_registro) FROM `{table}`")
+        bounds.append(cur.fetchone())
+    if cols[db_a] != cols[db_b]:
+        log(f"ERROR: columns differ: {db_a}={cols[db_a]} {db_b}={cols[db_b]}")
+        return 3
+    if 'id_registro' not in cols[db_a]:
+        log(f"ERROR: table '{table}' has no id_registro column")
+        return 3
+    ids = [v for bound in bounds for v in bound if v is not None]
+    if not ids:
+        log(f"Table '{table}' is empty in both databases.")
+        return 0
+    lo, hi = min(ids), max(ids)
+    h = row_hash_sql(cols[db_a])
+
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        ranges = split(lo, hi, chunk)
+        log(f"Comparing {db_a}.{table} vs {db_b}.{table}: id_registro {lo}..{hi}, {len(ranges)} chunks of {chunk}, {jobs} jobs")
+        queries = 0
+        leaves = []
+        level = 0
+        while ranges:
+            flags = list(ex.map(lambda r: range_differs(dbs, table, h, r), ranges))
+            queries += 2 * len(ranges)
+            differing = [r for r, d in zip(ranges, flags) if d]
+            log(f"  level {level}: {len(ranges)} ranges checked, {len(differing)} differ")
+            ranges = []
+            for r_lo, r_hi in differing:
+                width = r_hi - r_lo + 1
+                if width <= leaf:
+                    leaves.append((r_lo, r_hi))
+                else:
+                    ranges.extend(split(r_lo, r_hi, max(leaf, -(-width // FANOUT))))
+            level += 1
+
+        only_a, only_b, changed = [], [], []
+        for ha, hb in ex.map(lambda r: (row_hashes(db_a, table, h, *r), row_hashes(db_b, table, h, *r)), leaves):
+            only_a += sorted(set(ha) - set(hb))
+            only_b += sorted(set(hb) - set(ha))
+            changed += sorted(k for k in set(ha) & set(hb) if ha[k] != hb[k])
+        queries += 2 * len(leaves)
+
+    total = len(only_a) + len(only_b) + len(changed)
+    log(f"Checksum queries: {queries}")
+    if not total and leaves:
+        log(f"DIFF: {len(leaves)} range(s) have different checksums but no differing row was found "
+            f"(rows changed during the check?): " + ', '.join(f"{lo}..{hi}" for lo, hi in leaves[:max_report]))
+        return 1
+    if not total:
+        log(f"OK: {table} is identical in '{db_a}' and '{db_b}'.")
+        return 0
+
+    log(f"DIFF: {total} rows differ (only in {db_a}: {len(only_a)}, only in {db_b}: {len(only_b)}, changed: {len(changed)})")
+    report = (only_a + only_b + changed)[:max_report]
+    if report:
+        rows_a = fetch_rows(db_a, table, cols[db_a], report)
+        rows_b = fetch_rows(db_b, table, cols[db_a], report)
+        log(' | '.join(cols[db_a]))
+        for k in sorted(report):
+            log(f"id_registro={k}")
+            for db, rows in ((db_a, rows_a), (db_b, rows_b)):
+                for row in rows.get(k) or [None]:
+                    log(f"  {db}: {fmt_row(row)}")
+    if total > len(report):
+        log(f"... {total - len(report)} more rows not shown (--max-report)")
+    return 1
+
+if args.compare is not None:
+    db_a, db_b = args.compare or ('pruebas02', 'pruebas_02')
+    try:
+        code = compare_tables(db_a, db_b, args.table, args.chunk, args.leaf, args.jobs, args.max_report)
+    except mysql.connector.Error as err:
+        log('ERROR: ' + str(err))
+        out_lines.append(traceback.format_exc())
+        code = 3
+    finally:
+        for c in _conns:
+            c.close()
+    with open(LOG, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out_lines))
+    sys.exit(code)
+
 log(f"Attempting connection to {creds['host']}:{creds['port']} as {creds['user']}")
 try:
     conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'])
@@ -8,12 +8,21 @@ Inserta 200 registros de ejemplo en la tabla `tbl001` de la BD indicada.
 
 Usa variables de entorno para las credenciales: DB_HOST, DB_PORT, DB_USER, DB_PASS, DB_NAME
 Genera un log en `db_fill.log`.
+Si existe la tabla resumen `tbl001_resumen` (ver db_analytics.py), se actualiza en la misma
+transacción que cada lote insertado.
+Si `id_registro` no es AUTO_INCREMENT, los ids se reservan en un único bloque de
+DB_FILL_COUNT ids con el asignador de db_idalloc.py (que crea y siembra `tbl001_seq` si
+no existe), así que varios db_fill.py pueden insertar a la vez sin colisiones.
 """
 import os
 import sys
 import random
 import time
 
+import db_analytics
+import db_idalloc
+import profiling
+
 LOG = 'db_fill.log'
 
 creds = {
@@ -25,6 +34,9 @@ creds = {
 DB = os.environ.get('DB_NAME', 'pruebas02')
 NUM = int(os.environ.get('DB_FILL_COUNT', '200'))
 
+INSERT_SQL = "INSERT INTO tbl001 (registro_01, registro_02, registro_03) VALUES (%s, %s, %s)"
+INSERT_SQL_ID = "INSERT INTO tbl001 (id_registro, registro_01, registro_02, registro_03) VALUES (%s, %s, %s, %s)"
+
 out = []
 def log(s=''):
     ts = time.strftime('%Y-%m-%d %H:%M:%S')
@@ -32,14 +44,9 @@ def log(s=''):
     print(line)
     out.append(line)
 
-try:
-    import mysql.connector
-    from mysql.connector import errorcode
-except Exception as e:
-    log(f'ERROR: mysql connector missing: {e}')
+def write_log():
     with open(LOG,'w',encoding='utf-8') as f:
         f.write('\n'.join(out))
-    sys.exit(2)
 
 first_names = [
     'Luis','Ana','Carlos','María','Jorge','Lucía','Pedro','Sofía','Miguel','Elena',
@@ -62,76 +69,105 @@ def gen_prof():
 def gen_val():
     return round(random.uniform(1100.0, 3800.0), 2)
 
-try:
-    log(f"Conectando a {creds['host']}:{creds['port']} como {creds['user']} a DB '{DB}'")
-    conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=DB)
-    cursor = conn.cursor()
-    # Verify table exists
-    cursor.execute("SHOW TABLES LIKE 'tbl001'")
-    if cursor.fetchone() is None:
-        log("ERROR: tabla 'tbl001' no encontrada en la base de datos. Abortando.")
-        cursor.close()
-        conn.close()
-        with open(LOG,'w',encoding='utf-8') as f:
-            f.write('\n'.join(out))
-        sys.exit(4)
-
-    # Count before
-    cursor.execute("SELECT COUNT(*) FROM tbl001")
-    before = cursor.fetchone()[0]
-    log(f"Registros antes: {before}")
+def build_rows(num, ids=None):
+    """Filas para INSERT_SQL, o para INSERT_SQL_ID si se indican los ids (uno por fila)."""
+    if ids is None:
+        return [(gen_name(), gen_prof(), gen_val()) for _ in range(num)]
+    return [(i, gen_name(), gen_prof(), gen_val()) for i in ids]
 
-    # Check if id_registro is AUTO_INCREMENT
+def is_auto_increment(cursor):
     cursor.execute("SHOW COLUMNS FROM tbl001 LIKE 'id_registro'")
     col = cursor.fetchone()
-    auto_inc = False
     if col:
         # Field, Type, Null, Key, Default, Extra
         extra = col[5] if len(col) > 5 else ''
         if extra and 'auto_increment' in extra.lower():
-            auto_inc = True
-
-    if auto_inc:
-        # Prepare insert without id
-        sql = "INSERT INTO tbl001 (registro_01, registro_02, registro_03) VALUES (%s, %s, %s)"
-        data = [(gen_name(), gen_prof(), gen_val()) for _ in range(NUM)]
-    else:
-        # Need to supply id_registro manually
-        cursor.execute("SELECT MAX(id_registro) FROM tbl001")
-        mx = cursor.fetchone()[0]
-        start_id = (mx or 0) + 1
-        sql = "INSERT INTO tbl001 (id_registro, registro_01, registro_02, registro_03) VALUES (%s, %s, %s, %s)"
-        data = []
-        for i in range(NUM):
-            data.append((start_id + i, gen_name(), gen_prof(), gen_val()))
-
-    log(f"Insertando {NUM} registros en tbl001 (en batch). auto_increment={auto_inc}")
+            return True
+    return False
+
+def insert_rows(conn, cursor, sql, data, summary=False):
+    cursor.executemany(sql, data)
+    if summary:
+        # registro_02 y registro_03 son siempre las dos últimas columnas de la fila
+        db_analytics.update_summary(cursor, [(r[-2], r[-1]) for r in data])
+    conn.commit()
+
+def main():
     try:
-        cursor.executemany(sql, data)
-        conn.commit()
-    except mysql.connector.Error as e:
-        log(f"ERROR during insert: {e}")
-        conn.rollback()
+        import mysql.connector
+    except Exception as e:
+        log(f'ERROR: mysql connector missing: {e}')
+        write_log()
+        return 2
+
+    try:
+        log(f"Conectando a {creds['host']}:{creds['port']} como {creds['user']} a DB '{DB}'")
+        conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=DB)
+        cursor = conn.cursor()
+        # Verify table exists
+        cursor.execute("SHOW TABLES LIKE 'tbl001'")
+        if cursor.fetchone() is None:
+            log("ERROR: tabla 'tbl001' no encontrada en la base de datos. Abortando.")
+            cursor.close()
+            conn.close()
+            write_log()
+            return 4
+
+        # Count before
+        cursor.execute("SELECT COUNT(*) FROM tbl001")
+        before = cursor.fetchone()[0]
+        log(f"Registros antes: {before}")
+
+        # Check if id_registro is AUTO_INCREMENT
+        auto_inc = is_auto_increment(cursor)
+        summary = db_analytics.has_summary(cursor)
+
+        if auto_inc:
+            # Prepare insert without id
+            sql = INSERT_SQL
+            with profiling.phase('generacion'):
+                data = build_rows(NUM)
+        else:
+            # Need to supply id_registro manually: reservados por bloques en tbl001_seq
+            id_conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=DB)
+            try:
+                # Un solo take() por proceso: el bloque es exactamente NUM, sin ids perdidos
+                ids = db_idalloc.IdAllocator(id_conn, block=NUM).take(NUM)
+            finally:
+                id_conn.close()
+            log(f"Ids reservados: {ids[0]}..{ids[-1]}" if ids else 'Ids reservados: ninguno')
+            sql = INSERT_SQL_ID
+            with profiling.phase('generacion'):
+                data = build_rows(NUM, ids)
+
+        log(f"Insertando {NUM} registros en tbl001 (en batch). auto_increment={auto_inc} resumen={summary}")
+        try:
+            with profiling.phase('insercion'):
+                insert_rows(conn, cursor, sql, data, summary)
+        except mysql.connector.Error as e:
+            log(f"ERROR during insert: {e}")
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            write_log()
+            return 5
+
+        cursor.execute("SELECT COUNT(*) FROM tbl001")
+        after = cursor.fetchone()[0]
+        added = after - before
+        log(f"Registros después: {after} (añadidos: {added})")
+
         cursor.close()
         conn.close()
-        with open(LOG,'w',encoding='utf-8') as f:
-            f.write('\n'.join(out))
-        sys.exit(5)
-
-    cursor.execute("SELECT COUNT(*) FROM tbl001")
-    after = cursor.fetchone()[0]
-    added = after - before
-    log(f"Registros después: {after} (añadidos: {added})")
-
-    cursor.close()
-    conn.close()
-except mysql.connector.Error as err:
-    log('ERROR: ' + str(err))
-    import traceback
-    out.append(traceback.format_exc())
-    sys.exit(3)
-
-with open(LOG,'w',encoding='utf-8') as f:
-    f.write('\n'.join(out))
-
-sys.exit(0)
+    except mysql.connector.Error as err:
+        log('ERROR: ' + str(err))
+        import traceback
+        out.append(traceback.format_exc())
+        write_log()
+        return 3
+
+    write_log()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,11 +7,18 @@ Después muestra por terminal todas las filas de `tbl001`.
 
 Genera un log en `db_fix_autoinc.log`.
 Usa variables de entorno: DB_HOST, DB_PORT, DB_USER, DB_PASS, DB_NAME
+Con `--replica [RUTA]` el volcado final se lee de la réplica SQLite local (ver db_replica.py)
+en lugar de MySQL.
 """
+import argparse
 import os
+import sqlite3
 import sys
 import time
 
+import db_replica
+import profiling
+
 LOG = 'db_fix_autoinc.log'
 creds = {
     'host': os.environ.get('DB_HOST', '127.0.0.1'),
@@ -21,6 +28,12 @@ creds = {
 }
 DB = os.environ.get('DB_NAME', 'pruebas02')
 
+parser = argparse.ArgumentParser(description='Convierte id_registro en AUTO_INCREMENT y vuelca tbl001')
+parser.add_argument('--replica', nargs='?', const=db_replica.REPLICA, default=None,
+                    help='Leer el volcado de la réplica SQLite local (por defecto %(const)s)')
+args = parser.parse_args()
+profiling.script_phase()
+
 out = []
 
 def log(s=''):
@@ -121,19 +134,23 @@ try:
             log(f"Después: {col2}")
 
     # Mostrar todas las filas
-    log('Consultando todas las filas de tbl001:')
-    cursor.execute("SELECT * FROM tbl001 ORDER BY id_registro")
-    rows = cursor.fetchall()
-    # Print header
-    cursor.execute("SHOW COLUMNS FROM tbl001")
-    cols = [r[0] for r in cursor.fetchall()]
+    if args.replica:
+        log(f"Consultando todas las filas de tbl001 (réplica '{args.replica}'):")
+        cols, rows = db_replica.read_table(args.replica)
+    else:
+        log('Consultando todas las filas de tbl001:')
+        cursor.execute("SELECT * FROM tbl001 ORDER BY id_registro")
+        rows = cursor.fetchall()
+        # Print header
+        cursor.execute("SHOW COLUMNS FROM tbl001")
+        cols = [r[0] for r in cursor.fetchall()]
     log(' | '.join(cols))
     for r in rows:
         log(' | '.join([str(x) if x is not None else 'NULL' for x in r]))
 
     cursor.close()
     conn.close()
-except mysql.connector.Error as err:
+except (mysql.connector.Error, sqlite3.Error, FileNotFoundError) as err:
     log('ERROR: ' + str(err))
     import traceback
     out.append(traceback.format_exc())
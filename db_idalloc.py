@@ -0,0 +1,179 @@
+"""
+db_idalloc.py
+
+Asignador de ids por bloques (hi/lo) para `tbl001` cuando `id_registro` no es AUTO_INCREMENT.
+Cada bloque se reserva en la tabla de secuencias `tbl001_seq` con un único UPDATE atómico
+(`siguiente = LAST_INSERT_ID(siguiente + n)`) y los ids se reparten después desde memoria.
+Así varios procesos db_fill.py, en la misma o en distintas máquinas, insertan a la vez sin
+colisiones y sin leer MAX(id_registro) en cada llenado.
+
+- No hace falta ningún paso manual previo: si la reserva encuentra que falta la tabla de
+  secuencias (error 1146) o su fila, la crea y la siembra con MAX(id_registro) + 1
+  (CREATE TABLE IF NOT EXISTS + INSERT IGNORE) y reintenta. Con la secuencia ya creada,
+  cada reserva es solo el UPDATE: no se lee MAX() (id_registro puede no tener índice).
+- El asignador necesita su propia conexión: la pone en autocommit para que la reserva no
+  quede dentro (ni bloqueada por) la transacción del INSERT.
+- Los ids de un bloque que no se llegan a usar se pierden (quedan huecos), igual que con
+  AUTO_INCREMENT.
+- Todos los escritores deben pasar por el asignador. Si alguien inserta ids por su cuenta,
+  `python db_idalloc.py --resync` adelanta la secuencia hasta MAX(id_registro) + 1.
+
+Uso:
+    python db_idalloc.py            # muestra la secuencia (sembrándola si hace falta)
+    python db_idalloc.py --resync   # adelanta la secuencia tras inserciones externas
+
+Usa variables de entorno para las credenciales: DB_HOST, DB_PORT, DB_USER, DB_PASS, DB_NAME
+Tamaño de bloque por defecto: DB_ID_BLOCK. Genera un log en `db_idalloc.log`.
+"""
+import argparse
+import os
+import sys
+import time
+
+import profiling
+
+LOG = 'db_idalloc.log'
+
+creds = {
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '3306')),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASS', '123456'),
+}
+DB = os.environ.get('DB_NAME', 'pruebas02')
+BLOCK = int(os.environ.get('DB_ID_BLOCK', '1000'))
+
+SEQ_TABLE = 'tbl001_seq'
+SEQ_NAME = 'tbl001.id_registro'
+ER_NO_SUCH_TABLE = 1146
+
+SEQ_DDL = f"""CREATE TABLE IF NOT EXISTS {SEQ_TABLE} (
+    nombre VARCHAR(64) NOT NULL PRIMARY KEY,
+    siguiente BIGINT NOT NULL
+)"""
+
+out = []
+def log(s=''):
+    ts = time.strftime('%Y-%m-%d %H:%M:%S')
+    line = f"[{ts}] {s}"
+    print(line)
+    out.append(line)
+
+def write_log():
+    with open(LOG,'w',encoding='utf-8') as f:
+        f.write('\n'.join(out))
+
+class IdAllocator:
+    """Reparte ids de tbl001 desde bloques reservados en tbl001_seq."""
+
+    def __init__(self, conn, block=BLOCK, name=SEQ_NAME):
+        conn.autocommit = True
+        self.conn = conn
+        self.block = block
+        self.name = name
+        self.reservations = 0
+        self._next = 0
+        self._limit = 0  # primer id fuera del bloque actual
+
+    def seed(self):
+        """Crea la tabla/fila de la secuencia si no existen (única lectura de MAX)."""
+        cursor = self.conn.cursor()
+        cursor.execute(SEQ_DDL)
+        # Si dos procesos siembran a la vez, INSERT IGNORE deja pasar solo al primero
+        cursor.execute(
+            f"INSERT IGNORE INTO {SEQ_TABLE} (nombre, siguiente) "
+            "SELECT %s, COALESCE(MAX(id_registro), 0) + 1 FROM tbl001",
+            (self.name,),
+        )
+        cursor.close()
+
+    def resync(self):
+        """Adelanta la secuencia si hay ids en tbl001 por encima de ella."""
+        self.seed()
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"UPDATE {SEQ_TABLE} SET siguiente = GREATEST(siguiente, "
+            "(SELECT COALESCE(MAX(id_registro), 0) + 1 FROM tbl001)) WHERE nombre = %s",
+            (self.name,),
+        )
+        cursor.close()
+
+    def current(self):
+        cursor = self.conn.cursor()
+        cursor.execute(f"SELECT siguiente FROM {SEQ_TABLE} WHERE nombre = %s", (self.name,))
+        row = cursor.fetchone()
+        cursor.close()
+        return row[0] if row else None
+
+    def _reserve(self, n):
+        sql = f"UPDATE {SEQ_TABLE} SET siguiente = LAST_INSERT_ID(siguiente + %s) WHERE nombre = %s"
+        cursor = self.conn.cursor()
+        try:
+            try:
+                cursor.execute(sql, (n, self.name))
+                missing = cursor.rowcount == 0
+            except Exception as e:
+                if getattr(e, 'errno', None) != ER_NO_SUCH_TABLE:
+                    raise
+                missing = True
+            if missing:
+                # Primera reserva en esta BD: crear/sembrar la secuencia y reintentar
+                self.seed()
+                cursor.execute(sql, (n, self.name))
+            # LAST_INSERT_ID es por conexión: nadie más puede pisar este valor
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            hi = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        self.reservations += 1
+        self._next = hi - n
+        self._limit = hi
+
+    def take(self, n):
+        """Devuelve n ids. Si no caben en el bloque actual reserva de una vez lo que falta."""
+        ids = list(range(self._next, min(self._limit, self._next + n)))
+        self._next += len(ids)
+        missing = n - len(ids)
+        if missing:
+            self._reserve(max(self.block, missing))
+            ids.extend(range(self._next, self._next + missing))
+            self._next += missing
+        return ids
+
+def main():
+    p = argparse.ArgumentParser(description='Estado de la secuencia de ids de tbl001 (asignador hi/lo)')
+    p.add_argument('--resync', action='store_true', help='Adelantar la secuencia hasta MAX(id_registro) + 1')
+    args = p.parse_args()
+
+    try:
+        import mysql.connector
+    except Exception as e:
+        log(f'ERROR: mysql connector missing: {e}')
+        write_log()
+        return 2
+
+    try:
+        log(f"Conectando a {creds['host']}:{creds['port']} como {creds['user']} a DB '{DB}'")
+        conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=DB)
+        alloc = IdAllocator(conn)
+        with profiling.phase('resync' if args.resync else 'seed'):
+            if args.resync:
+                alloc.resync()
+            else:
+                alloc.seed()
+        if args.resync:
+            log('Secuencia resincronizada con MAX(id_registro).')
+        log(f"Secuencia '{SEQ_NAME}' en {SEQ_TABLE}: siguiente id libre = {alloc.current()} (bloque por defecto {BLOCK})")
+        conn.close()
+    except mysql.connector.Error as err:
+        log('ERROR: ' + str(err))
+        import traceback
+        out.append(traceback.format_exc())
+        write_log()
+        return 3
+
+    write_log()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
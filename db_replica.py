@@ -0,0 +1,236 @@
+"""
+db_replica.py
+
+Mantiene una réplica local en SQLite de la tabla `tbl001` para lectores de solo lectura
+(visor de timer.py, volcado de db_fix_autoinc.py con `--replica`).
+La sincronización es incremental: se traen, en lotes, las filas con `id_registro` mayor
+que el último ya replicado. Eso no basta cuando una fila con id menor se confirma más tarde
+(escritores con bloques de ids de db_idalloc.py, o transacciones AUTO_INCREMENT
+concurrentes), así que después se comparan los COUNT(*) por rangos de `id_registro` con
+MySQL (una consulta agrupada a cada lado) y se vuelven a copiar los rangos que no cuadran.
+Por defecto solo se verifican los últimos DB_REPLICA_WINDOW rangos, que es donde caen los
+commits tardíos, para no recorrer toda la tabla del primario en cada sincronización;
+`--verify-all` compara la tabla entera. Esto recupera filas que faltan o sobran; las filas
+modificadas sin cambiar el número de filas del rango no se detectan: para eso usa `--full`,
+que reconstruye la réplica.
+
+Uso:
+    python db_replica.py              # sincronización incremental + verificación de los últimos rangos
+    python db_replica.py --verify-all # verificar todos los rangos (recorre toda la tabla en MySQL)
+    python db_replica.py --no-verify  # solo filas nuevas (sin consultar conteos en MySQL)
+    python db_replica.py --full       # reconstruir la réplica
+
+Usa variables de entorno para las credenciales: DB_HOST, DB_PORT, DB_USER, DB_PASS, DB_NAME
+Ruta de la réplica: DB_REPLICA (por defecto `tbl001_replica.sqlite`); tamaño de lote: DB_REPLICA_BATCH;
+ancho de los rangos verificados: DB_REPLICA_CHUNK; rangos verificados por defecto: DB_REPLICA_WINDOW.
+Genera un log en `db_replica.log`.
+"""
+import argparse
+import datetime
+import decimal
+import os
+import sqlite3
+import sys
+import time
+
+import profiling
+
+LOG = 'db_replica.log'
+
+creds = {
+    'host': os.environ.get('DB_HOST', '127.0.0.1'),
+    'port': int(os.environ.get('DB_PORT', '3306')),
+    'user': os.environ.get('DB_USER', 'root'),
+    'password': os.environ.get('DB_PASS', '123456'),
+}
+DB = os.environ.get('DB_NAME', 'pruebas02')
+REPLICA = os.environ.get('DB_REPLICA', 'tbl001_replica.sqlite')
+BATCH = int(os.environ.get('DB_REPLICA_BATCH', '5000'))
+CHUNK = int(os.environ.get('DB_REPLICA_CHUNK', '10000'))
+WINDOW = int(os.environ.get('DB_REPLICA_WINDOW', '5'))
+TABLE = 'tbl001'
+
+out = []
+def log(s=''):
+    ts = time.strftime('%Y-%m-%d %H:%M:%S')
+    line = f"[{ts}] {s}"
+    print(line)
+    out.append(line)
+
+def write_log():
+    with open(LOG,'w',encoding='utf-8') as f:
+        f.write('\n'.join(out))
+
+def sqlite_type(coltype):
+    t = coltype.lower()
+    if 'int' in t:
+        return 'INTEGER'
+    if t.startswith(('float', 'double', 'real')):
+        return 'REAL'
+    if 'blob' in t or 'binary' in t:
+        return 'BLOB'
+    # DECIMAL se guarda como texto para no perder precisión; fechas en ISO
+    return 'TEXT'
+
+def adapt(value):
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+        return str(value)
+    return value
+
+def ensure_replica(lite, columns, full):
+    """Crea (o recrea si cambió el esquema o se pide --full) la tabla en la réplica."""
+    ddl = ', '.join(
+        f"`{name}` {sqlite_type(coltype)}{' PRIMARY KEY' if name == 'id_registro' else ''}"
+        for name, coltype in columns
+    )
+    cur = lite.execute(f"PRAGMA table_info(`{TABLE}`)")
+    current = [(r[1], r[2]) for r in cur.fetchall()]
+    wanted = [(name, sqlite_type(coltype)) for name, coltype in columns]
+    if full or current != wanted:
+        if full:
+            log('Reconstruyendo la réplica (--full).')
+        elif current:
+            log('El esquema de tbl001 cambió: se reconstruye la réplica.')
+        lite.execute(f"DROP TABLE IF EXISTS `{TABLE}`")
+        lite.execute(f"CREATE TABLE `{TABLE}` ({ddl})")
+        lite.commit()
+
+def repair_ranges(cursor, lite, col_sql, insert, last, chunk, first=None):
+    """Vuelve a copiar los rangos de id_registro en [first, last] cuyo COUNT(*) no coincide
+    con MySQL (first=None: desde el principio de la tabla).
+
+    Devuelve el número de rangos recopiados.
+    """
+    lower = '' if first is None else 'id_registro >= %s AND '
+    cursor.execute(
+        f"SELECT id_registro DIV %s, COUNT(*) FROM `{TABLE}` WHERE {lower}id_registro <= %s GROUP BY 1",
+        (chunk, last) if first is None else (chunk, first, last),
+    )
+    primary = {int(b): int(n) for b, n in cursor.fetchall()}
+    # id_registro es INTEGER en la réplica: la división es entera
+    cur = lite.execute(
+        f"SELECT id_registro / ?, COUNT(*) FROM `{TABLE}` WHERE {lower.replace('%s', '?')}id_registro <= ? GROUP BY 1",
+        (chunk, last) if first is None else (chunk, first, last),
+    )
+    replica = {int(b): int(n) for b, n in cur.fetchall()}
+    differing = sorted(b for b in set(primary) | set(replica) if primary.get(b) != replica.get(b))
+    for b in differing:
+        lo, hi = b * chunk, min(last, (b + 1) * chunk - 1)
+        cursor.execute(f"SELECT {col_sql} FROM `{TABLE}` WHERE id_registro BETWEEN %s AND %s", (lo, hi))
+        rows = cursor.fetchall()
+        lite.execute(f"DELETE FROM `{TABLE}` WHERE id_registro BETWEEN ? AND ?", (lo, hi))
+        lite.executemany(insert, [tuple(adapt(v) for v in r) for r in rows])
+        lite.commit()
+        log(f"  rango {lo}..{hi}: réplica={replica.get(b, 0)} MySQL={primary.get(b, 0)} filas -> recopiado")
+    return len(differing)
+
+def sync(conn, replica_path=REPLICA, batch=BATCH, full=False, verify=True, chunk=CHUNK, window=WINDOW):
+    """Trae a la réplica las filas nuevas de tbl001 y, con verify, repara los rangos
+    cuyo número de filas no coincide: los últimos `window` rangos de `chunk` ids, o todos
+    si window es None. Devuelve el número de filas nuevas copiadas."""
+    cursor = conn.cursor()
+    cursor.execute(f"SHOW COLUMNS FROM `{TABLE}`")
+    columns = [(r[0], r[1]) for r in cursor.fetchall()]
+    names = [c[0] for c in columns]
+    if 'id_registro' not in names:
+        raise ValueError(f"la tabla '{TABLE}' no tiene columna id_registro")
+    id_idx = names.index('id_registro')
+    col_sql = ', '.join(f"`{n}`" for n in names)
+
+    lite = sqlite3.connect(replica_path)
+    try:
+        lite.execute('PRAGMA journal_mode=WAL')
+        ensure_replica(lite, columns, full)
+        last = lite.execute(f"SELECT MAX(id_registro) FROM `{TABLE}`").fetchone()[0] or 0
+        log(f"Último id_registro replicado: {last}")
+
+        insert = f"INSERT OR REPLACE INTO `{TABLE}` ({col_sql}) VALUES ({', '.join('?' * len(names))})"
+        copied = 0
+        while True:
+            cursor.execute(
+                f"SELECT {col_sql} FROM `{TABLE}` WHERE id_registro > %s ORDER BY id_registro LIMIT %s",
+                (last, batch),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            lite.executemany(insert, [tuple(adapt(v) for v in r) for r in rows])
+            lite.commit()
+            copied += len(rows)
+            last = rows[-1][id_idx]
+            log(f"  lote de {len(rows)} filas (hasta id_registro={last})")
+        if verify and last:
+            first = None if window is None else max(0, (last // chunk - window + 1) * chunk)
+            repaired = repair_ranges(cursor, lite, col_sql, insert, last, chunk, first)
+            scope = 'toda la tabla' if first is None else f"id_registro {first}..{last}"
+            log(f"Verificación por rangos de {chunk} ids ({scope}): {repaired} rango(s) recopiado(s)")
+        return copied
+    finally:
+        cursor.close()
+        lite.close()
+
+def read_table(replica_path=REPLICA, table=TABLE):
+    """Lee la réplica en solo lectura. Devuelve (columnas, filas) ordenadas por id_registro."""
+    if not os.path.exists(replica_path):
+        raise FileNotFoundError(f"réplica '{replica_path}' no encontrada; ejecuta db_replica.py")
+    lite = sqlite3.connect(f"file:{os.path.abspath(replica_path)}?mode=ro", uri=True)
+    try:
+        cur = lite.execute(f"SELECT * FROM `{table}` ORDER BY id_registro")
+        columns = [d[0] for d in cur.description]
+        return columns, cur.fetchall()
+    finally:
+        lite.close()
+
+def main():
+    p = argparse.ArgumentParser(description='Sincroniza la réplica SQLite local de tbl001')
+    p.add_argument('--full', action='store_true', help='Reconstruir la réplica desde cero')
+    p.add_argument('--replica', default=REPLICA, help='Ruta del fichero SQLite de la réplica')
+    p.add_argument('--batch', type=int, default=BATCH, help='Filas por lote')
+    p.add_argument('--chunk', type=int, default=CHUNK, help='Ancho de los rangos de id_registro verificados')
+    p.add_argument('--window', type=int, default=WINDOW, help='Rangos finales verificados en cada sincronización')
+    p.add_argument('--verify-all', action='store_true', help='Verificar todos los rangos (recorre toda la tabla en MySQL)')
+    p.add_argument('--no-verify', action='store_true', help='No comparar conteos por rango con MySQL')
+    args = p.parse_args()
+    if args.batch <= 0 or args.chunk <= 0 or args.window <= 0:
+        p.error('--batch, --chunk y --window deben ser mayores que 0')
+
+    try:
+        import mysql.connector
+    except Exception as e:
+        log(f'ERROR: mysql connector missing: {e}')
+        write_log()
+        return 2
+
+    try:
+        log(f"Conectando a {creds['host']}:{creds['port']} como {creds['user']} a DB '{DB}'")
+        conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=DB)
+        cursor = conn.cursor()
+        cursor.execute(f"SHOW TABLES LIKE '{TABLE}'")
+        if cursor.fetchone() is None:
+            log(f"ERROR: tabla '{TABLE}' no encontrada en la base de datos. Abortando.")
+            cursor.close()
+            conn.close()
+            write_log()
+            return 4
+        cursor.close()
+
+        t0 = time.perf_counter()
+        with profiling.phase('sync'):
+            copied = sync(conn, args.replica, args.batch, args.full, not args.no_verify, args.chunk,
+                          None if args.verify_all else args.window)
+        log(f"Réplica '{args.replica}' al día: {copied} filas nuevas en {time.perf_counter() - t0:.2f} s")
+        conn.close()
+    except (mysql.connector.Error, sqlite3.Error, ValueError) as err:
+        log('ERROR: ' + str(err))
+        import traceback
+        out.append(traceback.format_exc())
+        write_log()
+        return 3
+
+    write_log()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,6 +7,8 @@ Guarda salida en db_schema.log
 import os
 import sys
 
+import profiling
+
 LOG = 'db_schema.log'
 creds = {
     'host': os.environ.get('DB_HOST', '127.0.0.1'),
@@ -22,44 +24,56 @@ def log(s=''):
     print(s)
     out.append(str(s))
 
-try:
-    import mysql.connector
-    from mysql.connector import errorcode
-except Exception as e:
-    log(f'ERROR: mysql connector missing: {e}')
+def write_log():
     with open(LOG,'w',encoding='utf-8') as f:
         f.write('\n'.join(out))
-    sys.exit(2)
 
-log(f"Connecting to {creds['host']}:{creds['port']} as {creds['user']} to inspect DB '{dbname}'")
-try:
-    conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=dbname)
-    cursor = conn.cursor()
+def describe_tables(cursor):
+    """Devuelve [(tabla, [(Field, Type, Null, Key, Default, Extra), ...]), ...]."""
     cursor.execute("SHOW TABLES")
     tables = [r[0] for r in cursor.fetchall()]
-    if not tables:
-        log(f"No tables found in database {dbname}")
+    schema = []
     for t in tables:
-        log('')
-        log(f"TABLE: {t}")
         cursor.execute(f"SHOW COLUMNS FROM `{t}`")
-        rows = cursor.fetchall()
-        # columns: Field, Type, Null, Key, Default, Extra
-        for row in rows:
-            field, coltype, nulls, key, default, extra = row
-            log(f"  - {field} | {coltype} | Null={nulls} | Key={key} | Default={default} | Extra={extra}")
-    cursor.close()
-    conn.close()
-except mysql.connector.Error as err:
-    log('ERROR: ' + str(err))
-    out.append('\n')
-    import traceback
-    out.append(traceback.format_exc())
+        schema.append((t, cursor.fetchall()))
+    return schema
+
+def main():
+    try:
+        import mysql.connector
+    except Exception as e:
+        log(f'ERROR: mysql connector missing: {e}')
+        write_log()
+        return 2
+
+    log(f"Connecting to {creds['host']}:{creds['port']} as {creds['user']} to inspect DB '{dbname}'")
+    try:
+        conn = mysql.connector.connect(host=creds['host'], port=creds['port'], user=creds['user'], password=creds['password'], database=dbname)
+        cursor = conn.cursor()
+        with profiling.phase('introspeccion'):
+            schema = describe_tables(cursor)
+        if not schema:
+            log(f"No tables found in database {dbname}")
+        for t, rows in schema:
+            log('')
+            log(f"TABLE: {t}")
+            # columns: Field, Type, Null, Key, Default, Extra
+            for row in rows:
+                field, coltype, nulls, key, default, extra = row
+                log(f"  - {field} | {coltype} | Null={nulls} | Key={key} | Default={default} | Extra={extra}")
+        cursor.close()
+        conn.close()
+    except mysql.connector.Error as err:
+        log('ERROR: ' + str(err))
+        out.append('\n')
+        import traceback
+        out.append(traceback.format_exc())
+
+    write_log()
 
-with open(LOG,'w',encoding='utf-8') as f:
-    f.write('\n'.join(out))
+    if any(line.startswith('ERROR') for line in out):
+        return 3
+    return 0
 
-if any(line.startswith('ERROR') for line in out):
-    sys.exit(3)
-else:
-    sys.exit(0)
+if __name__ == '__main__':
+    sys.exit(main())
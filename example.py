@@ -23,6 +23,8 @@ import cv2
 import matplotlib.pyplot as plt
 import numpy as np
 
+import profiling
+
 
 def load_image(path: str) -> Optional[np.ndarray]:
     img = cv2.imread(path, cv2.IMREAD_COLOR)
@@ -77,16 +79,18 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
 def main(argv: Optional[list[str]] = None) -> int:
     args = parse_args(argv or sys.argv[1:])
 
-    if args.image:
-        img = load_image(args.image)
-        if img is None:
-            print(f"Error: no se pudo leer la imagen en '{args.image}'", file=sys.stderr)
-            return 2
-    else:
-        img = make_test_image()
+    with profiling.phase('carga'):
+        if args.image:
+            img = load_image(args.image)
+        else:
+            img = make_test_image()
+    if img is None:
+        print(f"Error: no se pudo leer la imagen en '{args.image}'", file=sys.stderr)
+        return 2
 
     out_path = os.path.abspath(args.out)
-    show_and_save(img, out_path)
+    with profiling.phase('guardado'):
+        show_and_save(img, out_path)
     return 0
 
 
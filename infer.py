@@ -0,0 +1,196 @@
+"""
+infer.py
+
+Inferencia por lotes en CPU con un modelo de torchvision sobre imágenes obtenidas con
+los cargadores de `example.py` (`load_image` / `make_test_image`).
+Mide imágenes/s y latencia por lote para varios tamaños de lote, para poder dimensionar
+nodos solo-CPU. Guarda el resumen en `infer.log`.
+
+Uso:
+    # imágenes de prueba generadas (make_test_image)
+    python infer.py --batch-sizes 1 8 32
+
+    # imágenes reales (ficheros o carpetas), 4 workers y 8 hilos intra-op
+    python infer.py --images fotos\\ otra.jpg --workers 4 --threads 8
+
+    # otro modelo de torchvision con pesos preentrenados (requiere descarga)
+    python infer.py --model mobilenet_v3_large --weights DEFAULT
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+from torch.utils.data import DataLoader, Dataset
+
+import profiling
+from example import load_image, make_test_image
+
+LOG = 'infer.log'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+# Normalización estándar de ImageNet (RGB)
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+out: list[str] = []
+
+
+def log(s: str = '') -> None:
+    print(s)
+    out.append(s)
+
+
+def collect_images(items: list[str]) -> list[str]:
+    """Expande carpetas a la lista de imágenes que contienen (orden estable)."""
+    paths = []
+    for item in items:
+        if os.path.isdir(item):
+            for name in sorted(os.listdir(item)):
+                if name.lower().endswith(IMAGE_EXTS):
+                    paths.append(os.path.join(item, name))
+        else:
+            paths.append(item)
+    return paths
+
+
+def preprocess(img: np.ndarray, size: int) -> torch.Tensor:
+    # img llega en RGB uint8 (HWC) desde example.py
+    img = cv2.resize(img, (size, size), interpolation=cv2.INTER_AREA)
+    arr = (img.astype(np.float32) / 255.0 - MEAN) / STD
+    # HWC -> CHW como vista (sin copia); collate_channels_last monta el lote
+    return torch.from_numpy(arr).permute(2, 0, 1)
+
+
+class ImageDataset(Dataset):
+    """Devuelve `count` tensores; recorre `paths` en ciclo o genera imágenes de prueba."""
+
+    def __init__(self, paths: list[str], count: int, size: int) -> None:
+        self.paths = paths
+        self.count = count
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, idx: int) -> torch.Tensor:
+        if self.paths:
+            path = self.paths[idx % len(self.paths)]
+            img = load_image(path)
+            if img is None:
+                raise RuntimeError(f"no se pudo leer la imagen en '{path}'")
+        else:
+            img = make_test_image()
+        return preprocess(img, self.size)
+
+
+def collate_channels_last(samples: list[torch.Tensor]) -> torch.Tensor:
+    """Apila el lote ya en channels_last, dentro del worker y con una sola copia."""
+    # Se apilan las vistas HWC (contiguas) en NHWC y se exponen como NCHW channels_last
+    return torch.stack([s.permute(1, 2, 0) for s in samples]).permute(0, 3, 1, 2)
+
+
+def worker_init(_worker_id: int) -> None:
+    # Cada proceso worker decodifica en un solo hilo para no competir con el modelo
+    torch.set_num_threads(1)
+    cv2.setNumThreads(1)
+
+
+def build_model(name: str, weights: Optional[str]) -> torch.nn.Module:
+    model = torchvision.models.get_model(name, weights=weights)
+    model.eval()
+    return model.to(memory_format=torch.channels_last)
+
+
+def run_batch_size(model: torch.nn.Module, dataset: ImageDataset, batch_size: int,
+                   workers: int, warmup: int) -> dict:
+    loader = DataLoader(
+        dataset,
+        batch_size=batch_size,
+        num_workers=workers,
+        collate_fn=collate_channels_last,
+        worker_init_fn=worker_init if workers > 0 else None,
+        prefetch_factor=2 if workers > 0 else None,
+    )
+    latencies = []
+    images = 0
+    start = None
+    with torch.inference_mode():
+        for i, batch in enumerate(loader):
+            if i == warmup:
+                # El reloj de extremo a extremo empieza tras el calentamiento
+                start = time.perf_counter()
+            t0 = time.perf_counter()
+            model(batch)
+            dt = time.perf_counter() - t0
+            if i >= warmup:
+                latencies.append(dt)
+                images += batch.shape[0]
+    if start is None or not latencies:
+        return {'batch_size': batch_size, 'images': 0}
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'batch_size': batch_size,
+        'images': images,
+        'imgs_per_s': images / elapsed,
+        'model_imgs_per_s': images / sum(latencies),
+        'lat_mean_ms': statistics.fmean(latencies) * 1000,
+        'lat_p50_ms': latencies[len(latencies) // 2] * 1000,
+        'lat_p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+    }
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description='Inferencia por lotes en CPU con torchvision (benchmark)')
+    p.add_argument('--images', '-i', nargs='*', default=[], help='Ficheros o carpetas de imágenes (por defecto, imágenes de prueba)')
+    p.add_argument('--model', '-m', type=str, default='resnet50', help='Nombre del modelo en torchvision.models')
+    p.add_argument('--weights', type=str, default=None, help='Pesos a cargar (p.ej. DEFAULT); por defecto pesos aleatorios, sin descarga')
+    p.add_argument('--batch-sizes', '-b', type=int, nargs='+', default=[1, 4, 16, 32], help='Tamaños de lote a medir')
+    p.add_argument('--num-images', '-n', type=int, default=256, help='Imágenes procesadas por tamaño de lote')
+    p.add_argument('--size', type=int, default=224, help='Lado (px) de la entrada del modelo')
+    p.add_argument('--workers', '-w', type=int, default=2, help='Procesos worker del DataLoader (0 = en el proceso principal)')
+    p.add_argument('--threads', '-t', type=int, default=os.cpu_count() or 1, help='Hilos intra-op de torch')
+    p.add_argument('--warmup', type=int, default=2, help='Lotes de calentamiento excluidos de las medidas')
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = parse_args(argv or sys.argv[1:])
+
+    paths = collect_images(args.images)
+    if args.images and not paths:
+        print('Error: no se encontraron imágenes en las rutas indicadas', file=sys.stderr)
+        return 2
+
+    torch.set_num_threads(args.threads)
+    with profiling.phase('modelo'):
+        model = build_model(args.model, args.weights)
+    dataset = ImageDataset(paths, args.num_images, args.size)
+
+    source = f'{len(paths)} imágenes' if paths else 'imágenes de prueba'
+    log(f'Modelo={args.model} weights={args.weights} entrada={args.size}px origen={source}')
+    log(f'torch={torch.__version__} hilos intra-op={torch.get_num_threads()} workers={args.workers}')
+    for bs in args.batch_sizes:
+        with profiling.phase(f'batch{bs}'):
+            r = run_batch_size(model, dataset, bs, args.workers, args.warmup)
+        if not r['images']:
+            log(f'batch={bs:4d} | sin lotes medidos (sube --num-images o baja --warmup)')
+            continue
+        log(f"batch={bs:4d} | imgs/s={r['imgs_per_s']:8.1f} (modelo {r['model_imgs_per_s']:8.1f})"
+            f" | lat media={r['lat_mean_ms']:8.1f} ms p50={r['lat_p50_ms']:8.1f} ms p95={r['lat_p95_ms']:8.1f} ms")
+
+    with open(LOG, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(out))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -2,38 +2,100 @@
 make_icon.py
 
 Genera un icono simple de reloj (clock.ico) usando Pillow.
-Se crea un ICO multi-res (256x256, 64x64, 32x32) y se guarda en la raíz del proyecto como `clock.ico`.
+Se crea un ICO multi-res (por defecto 256x256, 64x64, 32x32) y se guarda en la raíz del proyecto como `clock.ico`.
+
+El reloj se dibuja una sola vez a alta resolución y se reduce con filtro LANCZOS a cada tamaño
+(opcionalmente en paralelo). Junto al icono se guarda `clock.ico.sha256` con un hash de los
+parámetros y de este script: si coincide con el actual no se regenera nada. Icono y sello se
+versionan juntos, así que un clon limpio (o el build de PyInstaller) no regenera el icono;
+tras cambiar este script, ejecútalo y haz commit de ambos ficheros.
 
 Ejecutar antes de compilar con PyInstaller para incluir el icono:
     python make_icon.py
+    python make_icon.py --sizes 256 128 64 48 32 16 --jobs 4
+    python make_icon.py --force   # regenerar aunque el hash coincida
 """
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from PIL import Image, ImageDraw
 
+import profiling
+
+DEFAULT_SIZES = [256, 64, 32]
+SUPERSAMPLE = 4  # el maestro se dibuja a SUPERSAMPLE x el tamaño mayor
+
+
+def render_master(s: int) -> Image.Image:
+    img = Image.new('RGBA', (s, s), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    # fondo circular
+    draw.ellipse((0, 0, s - 1, s - 1), fill=(30, 30, 30, 255))
+    # marca central
+    cx = cy = s // 2
+    r = int(s * 0.42)
+    # manecillas: hora (corta) y minuto (larga)
+    # minuto (vertical up)
+    draw.line((cx, cy, cx, cy - int(r * 0.8)), fill=(245, 245, 245, 255), width=max(1, s // 16))
+    # hora (slight right)
+    draw.line((cx, cy, cx + int(r * 0.5), cy), fill=(245, 245, 245, 255), width=max(1, s // 12))
+    # central pin
+    draw.ellipse((cx - s // 30, cy - s // 30, cx + s // 30, cy + s // 30), fill=(200, 30, 30, 255))
+    return img
+
+
+def params_hash(sizes) -> str:
+    h = hashlib.sha256()
+    h.update(json.dumps({'sizes': sorted(sizes), 'supersample': SUPERSAMPLE}).encode('utf-8'))
+    with open(os.path.abspath(__file__), 'rb') as f:
+        # fin de línea normalizado: el sello no cambia con core.autocrlf en Windows
+        h.update(f.read().replace(b'\r\n', b'\n'))
+    return h.hexdigest()
+
+
+def is_up_to_date(path: str, digest: str) -> bool:
+    try:
+        with open(path + '.sha256', 'r', encoding='utf-8') as f:
+            return os.path.exists(path) and f.read().strip() == digest
+    except OSError:
+        return False
+
+
+def create_clock_icon(path: str = 'clock.ico', sizes=None, jobs: int = 1, force: bool = False):
+    sizes = sorted(set(sizes or DEFAULT_SIZES), reverse=True)
+    digest = params_hash(sizes)
+    if not force and is_up_to_date(path, digest):
+        print(f'Icono sin cambios, se omite la generación: {path}')
+        return
+
+    with profiling.phase('render'):
+        master = render_master(sizes[0] * SUPERSAMPLE)
+
+        def downsample(s):
+            return master.resize((s, s), Image.LANCZOS)
+
+        # Image.resize libera el GIL, así que los hilos reducen en paralelo
+        if jobs > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as ex:
+                imgs = list(ex.map(downsample, sizes))
+        else:
+            imgs = [downsample(s) for s in sizes]
 
-def create_clock_icon(path: str = 'clock.ico'):
-    sizes = [256, 64, 32]
-    imgs = []
-    for s in sizes:
-        img = Image.new('RGBA', (s, s), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(img)
-        # fondo circular
-        draw.ellipse((0, 0, s - 1, s - 1), fill=(30, 30, 30, 255))
-        # marca central
-        cx = cy = s // 2
-        r = int(s * 0.42)
-        # manecillas: hora (corta) y minuto (larga)
-        # minuto (vertical up)
-        draw.line((cx, cy, cx, cy - int(r * 0.8)), fill=(245, 245, 245, 255), width=max(1, s // 16))
-        # hora (slight right)
-        draw.line((cx, cy, cx + int(r * 0.5), cy), fill=(245, 245, 245, 255), width=max(1, s // 12))
-        # central pin
-        draw.ellipse((cx - s // 30, cy - s // 30, cx + s // 30, cy + s // 30), fill=(200, 30, 30, 255))
-        imgs.append(img)
-
-    # guardar como ico multi-res
-    imgs[0].save(path, format='ICO', sizes=[(sizes[0], sizes[0]), (sizes[1], sizes[1]), (sizes[2], sizes[2])])
+    # guardar como ico multi-res (cada tamaño usa su propia reducción)
+    imgs[0].save(path, format='ICO', sizes=[(s, s) for s in sizes], append_images=imgs[1:])
+    with open(path + '.sha256', 'w', encoding='utf-8') as f:
+        f.write(digest + '\n')
     print(f'Icono guardado en: {path}')
 
 
 if __name__ == '__main__':
-    create_clock_icon('clock.ico')
+    p = argparse.ArgumentParser(description='Genera clock.ico (multi-res) para PyInstaller')
+    p.add_argument('--out', '-o', default='clock.ico', help='Ruta del icono de salida')
+    p.add_argument('--sizes', '-s', type=int, nargs='+', default=DEFAULT_SIZES, help='Tamaños (px) incluidos en el ICO')
+    p.add_argument('--jobs', '-j', type=int, default=1, help='Hilos para reducir los tamaños en paralelo')
+    p.add_argument('--force', '-f', action='store_true', help='Regenerar aunque el hash coincida')
+    args = p.parse_args()
+    create_clock_icon(args.out, args.sizes, args.jobs, args.force)
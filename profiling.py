@@ -0,0 +1,184 @@
+"""
+profiling.py
+
+Perfilado opcional de los scripts del proyecto, activado con la variable de entorno PROFILE:
+
+    PROFILE=sample    -> perfilador por muestreo (hilo aparte); escribe pilas colapsadas
+                         `<script>.<fase>.folded` (entrada de flamegraph.pl / speedscope).
+    PROFILE=cprofile  -> cProfile; escribe `<script>.<fase>.prof` (pstats) y el top-N
+                         por tiempo acumulado en `<script>.<fase>.prof.log`.
+
+En ambos modos se activa tracemalloc y se escribe en `<script>.<fase>.alloc.log` el pico
+de memoria y el top-N de diferencias por línea respecto al inicio de la fase
+(PROFILE_MEM=0 lo desactiva: tracemalloc ralentiza bastante el código que asigna mucho).
+tracemalloc es global al proceso, así que solo mide memoria una fase a la vez: si otra
+fase empieza mientras tanto (p.ej. en otro hilo) no escribe .alloc.log, y las asignaciones
+de ese hilo aparecen en el informe de la fase que mide. Si tracemalloc ya estaba activo
+(PYTHONTRACEMALLOC) se respeta y no se detiene al terminar. Los ficheros se guardan en el directorio actual, junto a los
+*.log de cada script. Otras variables: PROFILE_TOP (N, por defecto 25) y
+PROFILE_INTERVAL (ms entre muestras, por defecto 5).
+
+Sin PROFILE, `phase()` devuelve un contexto vacío y `script_phase()` no hace nada.
+
+Uso en un script:
+    import profiling
+
+    with profiling.phase('insercion'):
+        insert_rows(...)
+
+    # scripts sin función main: perfila desde aquí hasta la salida del proceso
+    profiling.script_phase()
+"""
+import atexit
+import contextlib
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MODE = os.environ.get('PROFILE', '').strip().lower()
+ENABLED = MODE in ('sample', 'cprofile')
+TOP = int(os.environ.get('PROFILE_TOP', '25'))
+MEM = os.environ.get('PROFILE_MEM', '1') != '0'
+INTERVAL = float(os.environ.get('PROFILE_INTERVAL', '5')) / 1000.0
+
+if MODE and not ENABLED:
+    print(f"WARN: PROFILE='{MODE}' no reconocido (usa 'sample' o 'cprofile'); perfilado desactivado.", file=sys.stderr)
+
+_lock = threading.Lock()
+_mem_owner = None  # fase que está midiendo memoria (tracemalloc es global al proceso)
+
+
+def script_name():
+    return os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+
+
+class _Sampler(threading.Thread):
+    """Muestrea periódicamente la pila de un hilo y cuenta pilas colapsadas."""
+
+    def __init__(self, target_ident, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.target = target_ident
+        self.interval = interval
+        self.counts = Counter()
+        self._stop_evt = threading.Event()
+
+    def run(self):
+        while not self._stop_evt.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ','))
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_evt.set()
+        self.join()
+
+
+class _Phase:
+    def __init__(self, name):
+        self.prefix = f"{script_name()}.{name}"
+        self.profiler = None
+        self.sampler = None
+
+    def __enter__(self):
+        global _mem_owner
+        self.mem = False
+        if MEM:
+            with _lock:
+                if _mem_owner is None:
+                    _mem_owner = self
+                    self.mem = True
+                else:
+                    owner = _mem_owner.prefix
+            if self.mem:
+                self.started_tracing = not tracemalloc.is_tracing()
+                if self.started_tracing:
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+                self.base_current = tracemalloc.get_traced_memory()[0]
+                self.base = tracemalloc.take_snapshot()
+            else:
+                print(f"[profiling] {self.prefix}: memoria no medida (la está midiendo '{owner}')", file=sys.stderr)
+        self.t0 = time.perf_counter()
+        if MODE == 'cprofile':
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError as e:
+                # Python >= 3.12 no permite dos perfiladores activos a la vez
+                print(f"WARN: cProfile no disponible para '{self.prefix}': {e}", file=sys.stderr)
+                self.profiler = None
+        else:
+            self.sampler = _Sampler(threading.get_ident(), INTERVAL)
+            self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        global _mem_owner
+        elapsed = time.perf_counter() - self.t0
+        if self.profiler is not None:
+            self.profiler.disable()
+            self._write_cprofile()
+        if self.sampler is not None:
+            self.sampler.stop()
+            self._write_folded()
+        if not self.mem:
+            print(f"[profiling] {self.prefix}: {elapsed:.3f} s", file=sys.stderr)
+            return False
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1] - self.base_current
+        if self.started_tracing:
+            tracemalloc.stop()
+        with _lock:
+            _mem_owner = None
+        self._write_alloc(snapshot, peak)
+        print(f"[profiling] {self.prefix}: {elapsed:.3f} s, pico de memoria {peak / 1024:.1f} KiB", file=sys.stderr)
+        return False
+
+    def _write_cprofile(self):
+        import pstats
+
+        self.profiler.dump_stats(self.prefix + '.prof')
+        with open(self.prefix + '.prof.log', 'w', encoding='utf-8') as f:
+            pstats.Stats(self.profiler, stream=f).sort_stats('cumulative').print_stats(TOP)
+
+    def _write_folded(self):
+        with open(self.prefix + '.folded', 'w', encoding='utf-8') as f:
+            for stack, n in self.sampler.counts.most_common():
+                f.write(f"{stack} {n}\n")
+
+    def _write_alloc(self, snapshot, peak):
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        stats = snapshot.filter_traces(filters).compare_to(self.base.filter_traces(filters), 'lineno')
+        with open(self.prefix + '.alloc.log', 'w', encoding='utf-8') as f:
+            f.write(f"Pico de memoria durante la fase (sobre la trazada al empezar): {peak / 1024:.1f} KiB\n")
+            f.write(f"Top {TOP} diferencias de memoria respecto al inicio de la fase (por línea):\n")
+            for stat in stats[:TOP]:
+                f.write(f"{stat}\n")
+
+
+def phase(name):
+    """Contexto que perfila el bloque como fase `name` si PROFILE está activo."""
+    if not ENABLED:
+        return contextlib.nullcontext()
+    return _Phase(name)
+
+
+def script_phase(name='main'):
+    """Perfila desde la llamada hasta la salida del proceso (incluido sys.exit)."""
+    if not ENABLED:
+        return
+    p = _Phase(name).__enter__()
+    atexit.register(p.__exit__, None, None, None)
@@ -13,9 +13,14 @@ Controles dentro de la ventana:
   - Barra espaciadora  -> Pausar/Reanudar.
   - Tecla r            -> Reiniciar a 2 minutos.
   - Tecla q o ESC      -> Salir de inmediato.
+
+Opciones:
+  --replica [RUTA]  -> Lee tbl001 de la replica SQLite local (ver db_replica.py)
+                       en lugar de consultar MySQL.
 """
 from __future__ import annotations
 
+import argparse
 import os
 import platform
 import queue
@@ -25,11 +30,14 @@ import time
 import tkinter as tk
 from dataclasses import dataclass, field
 from tkinter import scrolledtext
-from typing import List
+from typing import List, Optional
 
 import cv2
 import numpy as np
 
+import db_replica
+import profiling
+
 
 # --------------------------------------------------------------------------- #
 # CONFIGURACION RAPIDA (modifica estos valores sin tocar el resto del codigo)
@@ -164,30 +172,36 @@ def beep_end() -> None:
         pass
 
 
-def fetch_table_async(result_queue: queue.Queue, table: str = "tbl001") -> None:
-    """Lanza un hilo muy simple que consulta MySQL y deja el resultado en la cola."""
+def fetch_table_async(result_queue: queue.Queue, table: str = "tbl001", replica: Optional[str] = None) -> None:
+    """Lanza un hilo muy simple que consulta MySQL (o la replica local) y deja el resultado en la cola."""
 
     def worker() -> None:
-        try:
-            import mysql.connector
-
-            conn = mysql.connector.connect(
-                host=os.environ.get("DB_HOST", "127.0.0.1"),
-                port=int(os.environ.get("DB_PORT", "3306")),
-                user=os.environ.get("DB_USER", "root"),
-                password=os.environ.get("DB_PASS", "123456"),
-                database=os.environ.get("DB_NAME", "pruebas02"),
-            )
-            cursor = conn.cursor()
-            cursor.execute(f"SHOW COLUMNS FROM `{table}`")
-            columns = [row[0] for row in cursor.fetchall()]
-            cursor.execute(f"SELECT * FROM `{table}` ORDER BY id_registro")
-            rows = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            result_queue.put({"columns": columns, "rows": rows})
-        except Exception as exc:
-            result_queue.put({"error": str(exc)})
+        with profiling.phase("consulta"):
+            try:
+                if replica:
+                    columns, rows = db_replica.read_table(replica, table)
+                    result_queue.put({"columns": columns, "rows": rows})
+                    return
+
+                import mysql.connector
+
+                conn = mysql.connector.connect(
+                    host=os.environ.get("DB_HOST", "127.0.0.1"),
+                    port=int(os.environ.get("DB_PORT", "3306")),
+                    user=os.environ.get("DB_USER", "root"),
+                    password=os.environ.get("DB_PASS", "123456"),
+                    database=os.environ.get("DB_NAME", "pruebas02"),
+                )
+                cursor = conn.cursor()
+                cursor.execute(f"SHOW COLUMNS FROM `{table}`")
+                columns = [row[0] for row in cursor.fetchall()]
+                cursor.execute(f"SELECT * FROM `{table}` ORDER BY id_registro")
+                rows = cursor.fetchall()
+                cursor.close()
+                conn.close()
+                result_queue.put({"columns": columns, "rows": rows})
+            except Exception as exc:
+                result_queue.put({"error": str(exc)})
 
     threading.Thread(target=worker, daemon=True).start()
 
@@ -237,27 +251,28 @@ def handle_key(key: int, state: TimerState) -> bool:
     return True
 
 
-def run_timer(total_seconds: int) -> None:
+def run_timer(total_seconds: int, replica: Optional[str] = None) -> None:
     """Loop principal: dibuja frames, maneja teclas y dispara la base de datos."""
     state = TimerState(total_seconds)
     result_queue: queue.Queue = queue.Queue()
-    fetch_table_async(result_queue)
+    fetch_table_async(result_queue, replica=replica)
 
     cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
     cv2.resizeWindow(WINDOW_NAME, *WINDOW_SIZE)
 
-    beep_sent = False
-    while True:
-        if state.tick() and not beep_sent:
-            beep_end()
-            beep_sent = True
+    with profiling.phase("cronometro"):
+        beep_sent = False
+        while True:
+            if state.tick() and not beep_sent:
+                beep_end()
+                beep_sent = True
 
-        frame = render_frame(state)
-        cv2.imshow(WINDOW_NAME, frame)
+            frame = render_frame(state)
+            cv2.imshow(WINDOW_NAME, frame)
 
-        key = cv2.waitKey(100) & 0xFF
-        if key != 0xFF and not handle_key(key, state):
-            break
+            key = cv2.waitKey(100) & 0xFF
+            if key != 0xFF and not handle_key(key, state):
+                break
 
     cv2.destroyAllWindows()
     show_table_window(result_queue)
@@ -266,9 +281,22 @@ def run_timer(total_seconds: int) -> None:
 # --------------------------------------------------------------------------- #
 # ENTRADA DEL PROGRAMA
 # --------------------------------------------------------------------------- #
-def main() -> None:
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Cronometro OpenCV con consulta de tbl001 en paralelo")
+    p.add_argument(
+        "--replica",
+        nargs="?",
+        const=db_replica.REPLICA,
+        default=None,
+        help="Leer tbl001 de la replica SQLite local (por defecto %(const)s) en lugar de MySQL",
+    )
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv if argv is not None else sys.argv[1:])
     print("Iniciando cronometro de 2 minutos. Controlalo en la ventana OpenCV.")
-    run_timer(TOTAL_SECONDS)
+    run_timer(TOTAL_SECONDS, args.replica)
 
 
 if __name__ == "__main__":